@@ -83,6 +83,19 @@ DATABASES = {
     }
 }
 
+# The polls page cache is invalidated by bumping a counter in this cache, so
+# every worker process must share it. The file based default works for all
+# workers on one host; use memcached or redis when running on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+    }
+}
+
+# Seconds an anonymous page of the polls app stays in the page cache.
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=300, cast=int)
+
 MESSAGE_TAGS = {
     messages.DEBUG: 'alert-info',
     messages.INFO: 'alert-info',
@@ -1,6 +1,11 @@
 from django.contrib import admin
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.html import format_html
 
 from .models import Choice, Question, Vote
+from .paginator import ApproximateCountPaginator
 
 
 class ChoiceInline(admin.TabularInline):
@@ -14,11 +19,58 @@ class QuestionAdmin(admin.ModelAdmin):
         ('Date information', {'fields': ['pub_date', 'end_date'], 'classes': ['collapse']}),
     ]
     inlines = [ChoiceInline]
-    list_display = ('question_text', 'pub_date', 'end_date', 'was_published_recently')
+    list_display = ('question_text', 'pub_date', 'end_date', 'was_published_recently', 'vote_total')
     list_filter = ['pub_date', 'end_date']
     search_fields = ['question_text']
 
+    def get_queryset(self, request):
+        """
+        Annotate every question with its total votes, read from the
+        denormalized Choice.votes counters in the same query as the list.
+        """
+        totals = Choice.objects.filter(question=OuterRef('pk')).order_by().values(
+            'question').annotate(total=Sum('votes')).values('total')
+        return super().get_queryset(request).annotate(
+            vote_total=Coalesce(Subquery(totals), 0))
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Answer admin searches from the full-text index instead of LIKE scans.
+        """
+        if not search_term.strip():
+            return queryset, False
+        return queryset.search(search_term), False
+
+    def vote_total(self, obj):
+        """
+        Link the question's vote total to its votes in the Vote admin.
+        """
+        url = reverse('admin:polls_vote_changelist')
+        return format_html('<a href="{}?question__id__exact={}">{}</a>', url, obj.pk, obj.vote_total)
+
+    vote_total.admin_order_field = 'vote_total'
+    vote_total.short_description = 'Votes'
+
+
+class ChoiceAdmin(admin.ModelAdmin):
+    list_display = ('choice_text', 'question', 'votes')
+    list_select_related = ('question',)
+    autocomplete_fields = ['question']
+    search_fields = ['choice_text']
+    list_filter = ['question__pub_date']
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+class VoteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'question', 'choice', 'user', 'voted_at')
+    list_filter = ['voted_at', 'question__pub_date']
+    list_select_related = ('question', 'choice', 'user')
+    autocomplete_fields = ['question', 'choice', 'user']
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
 
 admin.site.register(Question, QuestionAdmin)
-admin.site.register(Choice)
-admin.site.register(Vote)
+admin.site.register(Choice, ChoiceAdmin)
+admin.site.register(Vote, VoteAdmin)
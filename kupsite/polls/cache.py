@@ -0,0 +1,141 @@
+"""
+Full-page cache for anonymous visitors.
+
+Pages are stored gzip-compressed, keyed by their absolute URL and cache
+generation numbers: a global one, plus one per question for views taking
+the question as `pk`. Bumping a generation with `invalidate_page_cache()`
+makes every page stored under it unreachable at once.
+"""
+import gzip
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+
+from .models import Question
+
+VERSION_KEY = 'polls:page_cache:version'
+QUESTION_VERSION_KEY = 'polls:page_cache:question:%s:version'
+
+
+def _cache_version(key=VERSION_KEY):
+    # Seed with the current time so an evicted counter never resurrects
+    # pages stored under an older generation.
+    cache.add(key, int(time.time() * 1000), None)
+    return cache.get(key)
+
+
+def _cache_key(request, question_id=None):
+    url = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    version = _cache_version()
+    if question_id is not None:
+        version = '%s.%s' % (version, _cache_version(QUESTION_VERSION_KEY % question_id))
+    return 'polls:page:%s:%s' % (version, url)
+
+
+def _cache_timeout():
+    """
+    Return how long a page may be cached: the configured timeout, cut short
+    by the next question being published or closed so that the page never
+    outlives the set of visible or votable questions it was rendered with.
+    """
+    timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+    now = timezone.now()
+    upcoming = Question.objects.aggregate(
+        next_pub=Min('pub_date', filter=Q(pub_date__gt=now)),
+        next_end=Min('end_date', filter=Q(end_date__gt=now)),
+    )
+    for moment in upcoming.values():
+        if moment is not None:
+            timeout = min(timeout, int((moment - now).total_seconds()) + 1)
+    return timeout
+
+
+def _accepts_gzip(request):
+    """
+    Return true if the Accept-Encoding header allows gzip. A coding listed
+    with `q=0` is refused, and `*` stands for every coding not listed.
+    """
+    qualities = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def _is_cacheable(request):
+    return (request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+            and not len(messages.get_messages(request)))
+
+
+def _build_response(request, entry):
+    if _accepts_gzip(request):
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(entry['content']), content_type=entry['content_type'])
+    patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+    response['Content-Length'] = str(len(response.content))
+    return response
+
+
+def invalidate_page_cache(question_id=None):
+    """
+    Drop every cached page, or only the pages of the question with id
+    `question_id` if it is given.
+    """
+    key = VERSION_KEY if question_id is None else QUESTION_VERSION_KEY % question_id
+    _cache_version(key)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def cache_anonymous_page(view_func):
+    """
+    Serve `view_func` from the page cache for anonymous visitors.
+
+    Requests from logged-in users and requests with pending messages are
+    passed straight through, and their responses are never stored. Views
+    taking a question as `pk` are also keyed by that question's generation.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _is_cacheable(request):
+            return view_func(request, *args, **kwargs)
+
+        key = _cache_key(request, kwargs.get('pk'))
+        entry = cache.get(key)
+        if entry is not None:
+            return _build_response(request, entry)
+
+        response = view_func(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if response.status_code != 200 or response.streaming or not _is_cacheable(request):
+            return response
+
+        entry = {
+            'content': gzip.compress(response.content),
+            'content_type': response['Content-Type'],
+        }
+        cache.set(key, entry, _cache_timeout())
+        return _build_response(request, entry)
+    return _wrapped_view
@@ -0,0 +1,44 @@
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour, TruncMinute
+
+from polls.models import Vote, VoteRollup
+
+TRUNCATE = {
+    VoteRollup.MINUTE: TruncMinute,
+    VoteRollup.HOUR: TruncHour,
+}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the minute and hour vote rollups from the Vote table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question', type=int, action='append', dest='questions',
+                            help='Only rebuild the rollups of this question id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Votes cast before vote times were recorded have no bucket.
+        votes = Vote.objects.filter(question__isnull=False, choice__isnull=False, voted_at__isnull=False)
+        rollups = VoteRollup.objects.all()
+        if options['questions']:
+            votes = votes.filter(question_id__in=options['questions'])
+            rollups = rollups.filter(question_id__in=options['questions'])
+
+        created = 0
+        with transaction.atomic():
+            rollups.delete()
+            for resolution, trunc in TRUNCATE.items():
+                buckets = votes.annotate(
+                    bucket=trunc('voted_at', tzinfo=dt_timezone.utc)
+                ).order_by().values('question_id', 'choice_id', 'bucket').annotate(count=Count('id'))
+                objs = VoteRollup.objects.bulk_create(
+                    (VoteRollup(resolution=resolution, **row) for row in buckets.iterator()),
+                    batch_size=options['batch_size'],
+                )
+                created += len(objs)
+        self.stdout.write(self.style.SUCCESS('Wrote %d vote rollups.' % created))
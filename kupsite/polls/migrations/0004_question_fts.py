@@ -0,0 +1,58 @@
+from django.db import migrations
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE polls_question_fts USING fts5(
+        question_text, content='polls_question', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER polls_question_fts_ai AFTER INSERT ON polls_question BEGIN
+        INSERT INTO polls_question_fts(rowid, question_text)
+        VALUES (new.id, new.question_text);
+    END
+    """,
+    """
+    CREATE TRIGGER polls_question_fts_ad AFTER DELETE ON polls_question BEGIN
+        INSERT INTO polls_question_fts(polls_question_fts, rowid, question_text)
+        VALUES ('delete', old.id, old.question_text);
+    END
+    """,
+    """
+    CREATE TRIGGER polls_question_fts_au AFTER UPDATE OF question_text ON polls_question BEGIN
+        INSERT INTO polls_question_fts(polls_question_fts, rowid, question_text)
+        VALUES ('delete', old.id, old.question_text);
+        INSERT INTO polls_question_fts(rowid, question_text)
+        VALUES (new.id, new.question_text);
+    END
+    """,
+    "INSERT INTO polls_question_fts(polls_question_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS polls_question_fts_au",
+    "DROP TRIGGER IF EXISTS polls_question_fts_ad",
+    "DROP TRIGGER IF EXISTS polls_question_fts_ai",
+    "DROP TABLE IF EXISTS polls_question_fts",
+]
+
+
+def run_sql(statements):
+    def forwards(apps, schema_editor):
+        # FTS5 is SQLite only; other backends use the icontains fallback.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return forwards
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_auto_20201101_2250'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(CREATE_SQL), run_sql(DROP_SQL)),
+    ]
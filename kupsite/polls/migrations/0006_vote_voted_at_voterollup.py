@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_question_date_indexes'),
+    ]
+
+    operations = [
+        # Existing votes have no known vote time, so they are added as NULL
+        # before the default for new votes is set.
+        migrations.AddField(
+            model_name='vote',
+            name='voted_at',
+            field=models.DateTimeField(db_index=True, null=True, verbose_name='date voted'),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='voted_at',
+            field=models.DateTimeField(db_index=True, null=True, default=django.utils.timezone.now,
+                                       verbose_name='date voted'),
+        ),
+        migrations.CreateModel(
+            name='VoteRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], max_length=6)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='polls.choice')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='polls.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', 'resolution', 'bucket'], name='polls_voter_questio_870b96_idx')],
+                'constraints': [models.UniqueConstraint(fields=('choice', 'resolution', 'bucket'), name='unique_vote_rollup_bucket')],
+            },
+        ),
+    ]
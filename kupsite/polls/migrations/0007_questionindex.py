@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:06
+
+import django.db.models.deletion
+import polls.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_vote_voted_at_voterollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionIndex',
+            fields=[
+                ('question', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='polls.question')),
+                ('question_text', polls.search.SearchTextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'polls_question_fts',
+                'managed': False,
+            },
+        ),
+    ]
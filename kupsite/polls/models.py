@@ -1,11 +1,38 @@
 import datetime
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connections, models
 from django.utils import timezone
 
+from .search import FTS_TABLE, SearchTextField, fts_query
+
+
+class QuestionQuerySet(models.QuerySet):
+    """
+    QuerySet for Question with full-text search support
+    """
+
+    def search(self, text):
+        """
+        Return questions whose text matches `text`, best matches first.
+
+        On SQLite the lookup is answered by the FTS5 index and ranked by
+        bm25 relevance; other databases fall back to a case-insensitive
+        substring match.
+        """
+        query = fts_query(text)
+        if not query:
+            return self.none()
+        if connections[self.db].vendor != 'sqlite':
+            return self.filter(question_text__icontains=text.strip())
+        return self.filter(search_index__question_text__match=query).order_by('search_index__rank')
+
 
 # Create your models here.
+# polls_question carries the triggers which keep the FTS5 index in sync
+# (migration 0004). On SQLite, AlterField/RemoveField on Question rebuilds
+# the table and silently drops them, so such migrations must recreate the
+# triggers, or search goes stale.
 class Question(models.Model):
     """
     A class to represent the Question
@@ -35,6 +62,14 @@ class Question(models.Model):
     pub_date = models.DateTimeField('date published')
     end_date = models.DateTimeField('date expired')
 
+    objects = QuestionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['pub_date']),
+            models.Index(fields=['end_date']),
+        ]
+
     def was_published_recently(self):
         """
         Returns true if the question is published date is longer than a day
@@ -64,6 +99,33 @@ class Question(models.Model):
     was_published_recently.short_description = 'Published recently?'
 
 
+class QuestionIndex(models.Model):
+    """
+    A class to represent a row of the FTS5 index over Question.question_text
+
+    The table is created and kept in sync by migration 0004, so Django only
+    reads from it; joining through it lets search be ranked in one scan.
+
+    Attributes
+    ----------
+    question : Question
+        Question class which the row indexes, stored as the FTS5 rowid
+    question_text : str
+        indexed copy of the question text, searchable with `__match`
+    rank : float
+        bm25 relevance of the row for the current MATCH, lower is better
+
+    """
+    question = models.OneToOneField(Question, primary_key=True, db_column='rowid',
+                                    related_name='search_index', on_delete=models.DO_NOTHING)
+    question_text = SearchTextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
 class Choice(models.Model):
     """
     A class to represent the question's choice
@@ -91,8 +153,90 @@ class Vote(models.Model):
 
     Attributes
     ----------
+    voted_at : datetime
+        time the vote was cast or last changed, None for votes cast before
+        vote times were recorded
     
     """
     choice = models.ForeignKey(Choice, null=True, on_delete=models.SET_NULL)
     question = models.ForeignKey(Question, null=True, on_delete=models.CASCADE)
     user = models.ForeignKey(User, blank=True, null=True, on_delete=models.CASCADE)
+    voted_at = models.DateTimeField('date voted', null=True, default=timezone.now, db_index=True)
+
+
+class VoteRollup(models.Model):
+    """
+    A class to represent the number of votes for a choice in one time bucket
+
+    Attributes
+    ----------
+    question : Question
+        Question class which the choice belongs to
+    choice : Choice
+        Choice class which the votes were cast for
+    resolution : str
+        size of the bucket, either minute or hour
+    bucket : datetime
+        start of the bucket in UTC
+    count : int
+        number of current votes for the choice cast within the bucket
+
+    Methods
+    -------
+    truncate(moment, resolution)
+        Return the start of the bucket `moment` falls into
+
+    record(choice, voted_at, delta=1)
+        Add `delta` votes for `choice` to every bucket containing `voted_at`
+
+    """
+    MINUTE = 'minute'
+    HOUR = 'hour'
+    RESOLUTION_CHOICES = [(MINUTE, 'Minute'), (HOUR, 'Hour')]
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    resolution = models.CharField(max_length=6, choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['choice', 'resolution', 'bucket'], name='unique_vote_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['question', 'resolution', 'bucket']),
+        ]
+
+    @classmethod
+    def truncate(cls, moment, resolution):
+        """
+        Return the start of the `resolution` bucket `moment` falls into
+        """
+        moment = moment.astimezone(datetime.timezone.utc).replace(second=0, microsecond=0)
+        if resolution == cls.HOUR:
+            moment = moment.replace(minute=0)
+        return moment
+
+    @classmethod
+    def record(cls, choice, voted_at, delta=1):
+        """
+        Add `delta` votes for `choice` to every bucket containing `voted_at`
+
+        A missing bucket is created for positive `delta` only. Removing a
+        vote that was never rolled up (cast before the rollups existed or
+        outside the vote view) leaves the buckets alone instead of driving
+        them negative; `rollup_votes` repairs such drift.
+        """
+        for resolution, _ in cls.RESOLUTION_CHOICES:
+            bucket = cls.truncate(voted_at, resolution)
+            rollups = cls.objects.filter(choice=choice, resolution=resolution, bucket=bucket)
+            if delta < 0:
+                rollups.filter(count__gte=-delta).update(count=models.F('count') + delta)
+                continue
+            # get_or_create retries the lookup when a concurrent vote
+            # creates the same bucket first.
+            rollup, _ = cls.objects.get_or_create(
+                choice=choice, resolution=resolution, bucket=bucket,
+                defaults={'question_id': choice.question_id})
+            cls.objects.filter(pk=rollup.pk).update(count=models.F('count') + delta)
@@ -0,0 +1,64 @@
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    A Paginator which avoids `COUNT(*)` over a whole table.
+
+    Unfiltered lists of large tables are counted from the database's own
+    row estimate instead of a full scan. Filtered lists and small tables
+    are counted exactly. An estimate is replaced by the exact count as soon
+    as a page comes back short, so page links never point past the data.
+    """
+    exact_count_threshold = 10000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return super().count
+        estimate = self._estimate_count(queryset)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        self.estimated = True
+        return estimate
+
+    def page(self, number):
+        page = super().page(number)
+        if not self.estimated or len(page) == self.per_page:
+            return page
+        if len(page):
+            exact = (page.number - 1) * self.per_page + len(page)
+        else:
+            exact = self.object_list.count()
+        self.__dict__['count'] = exact
+        self.__dict__.pop('num_pages', None)
+        self.estimated = False
+        if page.number > self.num_pages:
+            raise EmptyPage('That page contains no results')
+        return page
+
+    @staticmethod
+    def _estimate_count(queryset):
+        """
+        Return an estimated row count for the table behind `queryset`, or
+        None if the database can not give one cheaply.
+        """
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [table])
+                row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            # The largest primary key is read from the index. It is an upper
+            # bound which can be far too high after large deletes; page()
+            # corrects it once the real end of the list is reached.
+            return queryset.model._default_manager.using(queryset.db).aggregate(
+                estimate=Max('pk'))['estimate']
+        return None
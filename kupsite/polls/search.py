@@ -0,0 +1,46 @@
+"""
+Helpers for the SQLite FTS5 index which mirrors ``Question.question_text``.
+
+The ``polls_question_fts`` virtual table is created by migration 0004 and
+kept in sync with ``polls_question`` by database triggers.
+"""
+import re
+
+from django.db import models
+
+FTS_TABLE = 'polls_question_fts'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_query(text):
+    """
+    Convert free text typed by a user into a safe FTS5 MATCH expression.
+
+    Every word is quoted so FTS5 operators and punctuation in the input can
+    not cause a syntax error; the last word is treated as a prefix so results
+    show up while the user is still typing. Returns an empty string when the
+    text has no searchable words.
+    """
+    words = _WORD_RE.findall(text or '')
+    if not words:
+        return ''
+    terms = ['"%s"' % word for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class SearchTextField(models.TextField):
+    """
+    A column of an FTS5 table, which supports the `match` lookup.
+    """
+
+
+@SearchTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), lhs_params + rhs_params
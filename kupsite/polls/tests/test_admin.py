@@ -0,0 +1,133 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Choice, Question, Vote
+from polls.paginator import ApproximateCountPaginator
+
+
+def create_question(question_text, days, ends_days=30):
+    """
+    Create a question with the given `question_text`, published `days`
+    and ending `ends_days` offset to now.
+    """
+    time = timezone.now() + datetime.timedelta(days=days)
+    ends = timezone.now() + datetime.timedelta(days=ends_days)
+    return Question.objects.create(question_text=question_text, pub_date=time, end_date=ends)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PollsAdminTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'secret-password')
+        self.client.post(reverse('admin:login'), {'username': 'admin', 'password': 'secret-password'})
+        self.question = create_question('Admin question?', days=-1)
+        self.yes = self.question.choice_set.create(choice_text='Yes', votes=2)
+        self.no = self.question.choice_set.create(choice_text='No', votes=1)
+        for user_number in range(3):
+            user = User.objects.create_user('voter%d' % user_number)
+            Vote.objects.create(question=self.question, choice=self.yes, user=user)
+
+    def test_question_list_shows_vote_total(self):
+        """
+        The question changelist shows each question's summed votes.
+        """
+        create_question('No votes yet?', days=-1)
+        response = self.client.get(reverse('admin:polls_question_changelist'))
+        totals = {q.question_text: q.vote_total for q in response.context['cl'].result_list}
+        self.assertEqual(totals, {'Admin question?': 3, 'No votes yet?': 0})
+
+    def test_vote_list_does_not_query_per_row(self):
+        """
+        Adding votes does not add queries to the vote changelist.
+        """
+        url = reverse('admin:polls_vote_changelist')
+        with CaptureQueriesContext(connection) as before:
+            self.assertContains(self.client.get(url), 'voter0')
+        for user_number in range(3, 6):
+            user = User.objects.create_user('voter%d' % user_number)
+            Vote.objects.create(question=self.question, choice=self.no, user=user)
+        with CaptureQueriesContext(connection) as after:
+            self.assertContains(self.client.get(url), 'voter5')
+        self.assertEqual(len(before), len(after))
+
+    def test_vote_list_filtered_by_question(self):
+        """
+        The vote total links to the votes of that question only.
+        """
+        other = create_question('Other question?', days=-1)
+        Vote.objects.create(question=other, choice=other.choice_set.create(choice_text='Maybe'))
+        response = self.client.get(reverse('admin:polls_vote_changelist'),
+                                   {'question__id__exact': self.question.id})
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_choice_and_vote_lists_filter_on_question_date(self):
+        """
+        Choices and votes can be filtered by their question's pub_date.
+        """
+        old = create_question('Old question?', days=-60)
+        Vote.objects.create(question=old, choice=old.choice_set.create(choice_text='Maybe'))
+        since = (timezone.now() - datetime.timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S%z')
+        response = self.client.get(reverse('admin:polls_vote_changelist'), {'question__pub_date__gte': since})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.client.get(reverse('admin:polls_choice_changelist'), {'question__pub_date__gte': since})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+
+class ApproximateCountPaginatorTests(TestCase):
+
+    def test_small_table_is_counted_exactly(self):
+        """
+        Below the threshold the paginator counts rows exactly.
+        """
+        question = create_question('Paginated question?', days=-1)
+        choices = [Choice.objects.create(question=question, choice_text=str(n)) for n in range(3)]
+        choices[0].delete()
+        paginator = ApproximateCountPaginator(Choice.objects.order_by('pk'), 100)
+        self.assertEqual(paginator.count, 2)
+
+    def test_large_table_is_estimated(self):
+        """
+        Above the threshold an unfiltered list uses the row estimate, while a
+        filtered list is still counted exactly.
+        """
+        question = create_question('Paginated question?', days=-1)
+        choices = [Choice.objects.create(question=question, choice_text=str(n)) for n in range(3)]
+        choices[0].delete()
+
+        paginator = ApproximateCountPaginator(Choice.objects.order_by('pk'), 100)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.count, choices[-1].pk)
+
+        paginator = ApproximateCountPaginator(Choice.objects.filter(question=question).order_by('pk'), 100)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.count, 2)
+
+    def test_short_page_corrects_estimate(self):
+        """
+        Once a page comes back short the estimate is replaced by the exact
+        count, and pages past the real end are empty.
+        """
+        question = create_question('Paginated question?', days=-1)
+        choices = [Choice.objects.create(question=question, choice_text=str(n)) for n in range(5)]
+        Choice.objects.filter(pk__in=[choice.pk for choice in choices[1:4]]).delete()
+
+        paginator = ApproximateCountPaginator(Choice.objects.order_by('pk'), 1)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.num_pages, choices[-1].pk)
+        self.assertEqual(len(paginator.page(2)), 1)
+        with self.assertRaises(EmptyPage):
+            paginator.page(3)
+        self.assertEqual((paginator.count, paginator.num_pages), (2, 2))
+
+        paginator = ApproximateCountPaginator(Choice.objects.order_by('pk'), 4)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(len(paginator.page(1)), 2)
+        self.assertEqual((paginator.count, paginator.num_pages), (2, 1))
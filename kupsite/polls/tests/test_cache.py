@@ -0,0 +1,127 @@
+import datetime
+import gzip
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Question
+
+
+def create_question(question_text, days, ends_days=30):
+    """
+    Create a question with the given `question_text`, published `days`
+    and ending `ends_days` offset to now.
+    """
+    time = timezone.now() + datetime.timedelta(days=days)
+    ends = timezone.now() + datetime.timedelta(days=ends_days)
+    return Question.objects.create(question_text=question_text, pub_date=time, end_date=ends)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnonymousPageCacheTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question('Cached question?', days=-1)
+        self.choice = self.question.choice_set.create(choice_text='Yes')
+
+    def test_second_request_is_served_from_cache(self):
+        """
+        A repeated anonymous request does not touch the database.
+        """
+        url = reverse('polls:results', args=(self.question.id,))
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertContains(second, 'Cached question?')
+
+    def test_gzip_served_when_accepted(self):
+        """
+        Clients accepting gzip get the stored compressed bytes as they are.
+        """
+        url = reverse('polls:index')
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+    def test_gzip_refused_with_zero_quality(self):
+        """
+        Clients which refuse gzip with q=0 get the page uncompressed.
+        """
+        url = reverse('polls:index')
+        plain = self.client.get(url)
+        for header in ('gzip;q=0, identity', 'deflate, *;q=0.5, gzip; q=0'):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.content, plain.content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='br, *;q=0.1')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_new_question_invalidates_cache(self):
+        """
+        Saving a question drops the cached index page.
+        """
+        url = reverse('polls:index')
+        self.client.get(url)
+        create_question('Fresh question?', days=-1)
+        self.assertContains(self.client.get(url), 'Fresh question?')
+
+    def test_vote_change_invalidates_cache(self):
+        """
+        Changing a choice's votes drops the cached results page.
+        """
+        url = reverse('polls:results', args=(self.question.id,))
+        self.assertContains(self.client.get(url), '0 votes')
+        self.choice.votes = 3
+        self.choice.save()
+        self.assertContains(self.client.get(url), '3 votes')
+
+    def test_vote_change_keeps_other_pages_cached(self):
+        """
+        Changing votes only drops the results pages of that question.
+        """
+        other = create_question('Other question?', days=-1)
+        urls = [reverse('polls:index'), reverse('polls:results', args=(other.id,))]
+        for url in urls:
+            self.client.get(url)
+        self.choice.votes = 3
+        self.choice.save()
+        with self.assertNumQueries(0):
+            for url in urls:
+                self.client.get(url)
+
+    def test_invalidation_waits_for_commit(self):
+        """
+        The cache is only invalidated once the change is committed, so a
+        request during the transaction can not store the old rows under
+        the new generation.
+        """
+        url = reverse('polls:results', args=(self.question.id,))
+        self.client.get(url)
+        with transaction.atomic():
+            self.choice.votes = 3
+            self.choice.save()
+            with self.assertNumQueries(0):
+                self.assertContains(self.client.get(url), '0 votes')
+        self.assertContains(self.client.get(url), '3 votes')
+
+    def test_logged_in_user_not_cached(self):
+        """
+        Pages rendered for a logged-in user are neither stored nor served
+        from the cache.
+        """
+        User.objects.create_user('voter', password='secret-password')
+        url = reverse('polls:index')
+        self.client.get(url)
+        self.client.post(reverse('login'), {'username': 'voter', 'password': 'secret-password'})
+        self.assertContains(self.client.get(url), 'Hi voter!')
+        self.client.post(reverse('logout'))
+        self.assertContains(self.client.get(url), 'You are not logged in')
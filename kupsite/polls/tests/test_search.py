@@ -0,0 +1,101 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Question
+from polls.search import FTS_TABLE, fts_query
+
+
+def create_question(question_text, days, ends_days=30):
+    """
+    Create a question with the given `question_text`, published `days`
+    and ending `ends_days` offset to now.
+    """
+    time = timezone.now() + datetime.timedelta(days=days)
+    ends = timezone.now() + datetime.timedelta(days=ends_days)
+    return Question.objects.create(question_text=question_text, pub_date=time, end_date=ends)
+
+
+class FtsQueryTests(TestCase):
+
+    def test_quotes_words_and_prefixes_last(self):
+        """
+        Every word is quoted and the last one is a prefix match.
+        """
+        self.assertEqual(fts_query('best  pizza'), '"best" "pizza"*')
+
+    def test_strips_fts_syntax(self):
+        """
+        Quotes and operators typed by a user can not break the MATCH query.
+        """
+        self.assertEqual(fts_query('"pizza" OR (-'), '"pizza" "OR"*')
+        self.assertEqual(fts_query(' ?! '), '')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class QuestionSearchTests(TestCase):
+
+    def test_search_matches_words(self):
+        """
+        search() returns only questions containing the searched words.
+        """
+        pizza = create_question('What is the best pizza topping?', days=-1)
+        create_question('Which course is hardest?', days=-1)
+        self.assertEqual(list(Question.objects.search('pizza')), [pizza])
+
+    def test_search_follows_updates_and_deletes(self):
+        """
+        The index stays in sync when question text changes or is deleted.
+        """
+        question = create_question('Favourite pizza?', days=-1)
+        question.question_text = 'Favourite pasta?'
+        question.save()
+        self.assertEqual(list(Question.objects.search('pizza')), [])
+        self.assertEqual(list(Question.objects.search('pasta')), [question])
+        question.delete()
+        self.assertEqual(list(Question.objects.search('pasta')), [])
+
+    def test_search_ranks_by_relevance(self):
+        """
+        Questions which mention the term more often come first.
+        """
+        once = create_question('Pizza or burgers for the party snacks?', days=-1)
+        twice = create_question('Pizza: thin pizza or thick?', days=-1)
+        self.assertEqual(list(Question.objects.search('pizza')), [twice, once])
+
+    def test_index_search(self):
+        """
+        The index view filters published questions with `?q=`.
+        """
+        create_question('Best pizza?', days=-1)
+        create_question('Future pizza?', days=5)
+        create_question('Hardest course?', days=-1)
+        response = self.client.get(reverse('polls:index'), {'q': 'pizza'})
+        self.assertEqual(
+            [q.question_text for q in response.context['latest_question_list']],
+            ['Best pizza?']
+        )
+        self.assertEqual(response.context['query'], 'pizza')
+
+    def test_index_search_no_match(self):
+        """
+        A search without results shows an appropriate message.
+        """
+        create_question('Best pizza?', days=-1)
+        response = self.client.get(reverse('polls:index'), {'q': 'sushi'})
+        self.assertContains(response, 'No polls match')
+
+    def test_fts_triggers_exist_after_migrations(self):
+        """
+        The triggers syncing the index survive every migration on
+        polls_question; a table rebuild would silently drop them.
+        """
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 index is SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'polls_question'")
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(triggers, {FTS_TABLE + '_ai', FTS_TABLE + '_ad', FTS_TABLE + '_au'})
@@ -0,0 +1,178 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Question, Vote, VoteRollup
+
+
+def create_question(question_text, days, ends_days=30):
+    """
+    Create a question with the given `question_text`, published `days`
+    and ending `ends_days` offset to now.
+    """
+    time = timezone.now() + datetime.timedelta(days=days)
+    ends = timezone.now() + datetime.timedelta(days=ends_days)
+    return Question.objects.create(question_text=question_text, pub_date=time, end_date=ends)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class VoteTimelineTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user('voter', password='secret-password')
+        self.client.post(reverse('login'), {'username': 'voter', 'password': 'secret-password'})
+        self.question = create_question('Timeline question?', days=-1)
+        self.yes = self.question.choice_set.create(choice_text='Yes')
+        self.no = self.question.choice_set.create(choice_text='No')
+
+    def rollup_counts(self, resolution):
+        return dict(VoteRollup.objects.filter(
+            question=self.question, resolution=resolution).values_list('choice_id', 'count'))
+
+    def test_vote_updates_rollups(self):
+        """
+        Voting adds the vote to its minute and hour buckets.
+        """
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.yes.id})
+        vote = Vote.objects.get()
+        self.assertIsNotNone(vote.voted_at)
+        for resolution in (VoteRollup.MINUTE, VoteRollup.HOUR):
+            self.assertEqual(self.rollup_counts(resolution), {self.yes.id: 1})
+
+    def test_changed_vote_moves_rollup(self):
+        """
+        Changing a vote moves it from the old choice to the new one.
+        """
+        url = reverse('polls:vote', args=(self.question.id,))
+        self.client.post(url, {'choice': self.yes.id})
+        self.client.post(url, {'choice': self.no.id})
+        self.assertEqual(self.rollup_counts(VoteRollup.HOUR), {self.yes.id: 0, self.no.id: 1})
+
+    def test_votes_in_same_bucket_share_rollup(self):
+        """
+        Votes for one choice in the same bucket add to a single rollup row.
+        """
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.yes.id})
+        VoteRollup.record(self.yes, Vote.objects.get().voted_at)
+        self.assertEqual(self.rollup_counts(VoteRollup.MINUTE), {self.yes.id: 2})
+
+    def test_changing_vote_without_rollup_does_not_go_negative(self):
+        """
+        Changing a vote which was never rolled up, whether it predates vote
+        times or was created outside the vote view, leaves no negative
+        counts behind.
+        """
+        user = User.objects.get(username='voter')
+        url = reverse('polls:vote', args=(self.question.id,))
+        for voted_at in (None, timezone.now()):
+            VoteRollup.objects.all().delete()
+            Vote.objects.update_or_create(defaults={'choice': self.yes, 'voted_at': voted_at},
+                                          question=self.question, user=user)
+            self.client.post(url, {'choice': self.no.id})
+            for resolution in (VoteRollup.MINUTE, VoteRollup.HOUR):
+                self.assertEqual(self.rollup_counts(resolution), {self.no.id: 1})
+
+    def test_deleted_votes_leave_rollups(self):
+        """
+        Deleting votes outside the vote view, directly or by deleting the
+        user, removes them from the rollups.
+        """
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.yes.id})
+        other = User.objects.create_user('other')
+        VoteRollup.record(self.yes, timezone.now())
+        Vote.objects.create(question=self.question, choice=self.yes, user=other)
+        other.delete()
+        self.assertEqual(self.rollup_counts(VoteRollup.HOUR), {self.yes.id: 1})
+        Vote.objects.get().delete()
+        self.assertEqual(self.rollup_counts(VoteRollup.HOUR), {self.yes.id: 0})
+
+    def test_truncate(self):
+        """
+        truncate() returns the start of the minute or hour bucket in UTC.
+        """
+        moment = datetime.datetime(2020, 11, 1, 20, 13, 45, 123, tzinfo=datetime.timezone.utc)
+        self.assertEqual(VoteRollup.truncate(moment, VoteRollup.MINUTE), moment.replace(second=0, microsecond=0))
+        self.assertEqual(VoteRollup.truncate(moment, VoteRollup.HOUR),
+                         moment.replace(minute=0, second=0, microsecond=0))
+
+    def test_timeline_endpoint(self):
+        """
+        The timeline endpoint returns the rollups of the question as JSON.
+        """
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.yes.id})
+        response = self.client.get(reverse('polls:timeline', args=(self.question.id,)),
+                                   {'resolution': 'minute'})
+        data = response.json()
+        self.assertEqual(data['resolution'], 'minute')
+        self.assertEqual(len(data['choices']), 2)
+        self.assertEqual([(point['choice'], point['votes']) for point in data['timeline']], [(self.yes.id, 1)])
+
+    def test_timeline_endpoint_window(self):
+        """
+        The timeline only returns buckets between `since` and `until`, and
+        by default the last window before now.
+        """
+        now = timezone.now()
+        for days in (0, 2, 40):
+            VoteRollup.record(self.yes, now - datetime.timedelta(days=days))
+        url = reverse('polls:timeline', args=(self.question.id,))
+
+        data = self.client.get(url).json()
+        self.assertEqual(sum(point['votes'] for point in data['timeline']), 2)
+        data = self.client.get(url, {'resolution': 'minute'}).json()
+        self.assertEqual(sum(point['votes'] for point in data['timeline']), 1)
+        data = self.client.get(url, {
+            'since': (now - datetime.timedelta(days=45)).isoformat(),
+            'until': (now - datetime.timedelta(days=30)).isoformat(),
+        }).json()
+        self.assertEqual(sum(point['votes'] for point in data['timeline']), 1)
+
+    def test_timeline_endpoint_rejects_bad_input(self):
+        """
+        Unknown resolutions, bad or too wide ranges and unpublished questions
+        are rejected.
+        """
+        url = reverse('polls:timeline', args=(self.question.id,))
+        now = timezone.now()
+        self.assertEqual(self.client.get(url, {'resolution': 'day'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'until': '2020-13-01T00:00'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'until': '0001-01-01T00:00:00'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {
+            'since': '0001-01-01T00:00:00+05:00', 'until': '0001-01-01T01:00:00+05:00',
+        }).status_code, 400)
+        self.assertEqual(self.client.get(url, {
+            'resolution': 'minute',
+            'since': (now - datetime.timedelta(days=2)).isoformat(),
+        }).status_code, 400)
+        self.assertEqual(self.client.get(url, {
+            'since': now.isoformat(),
+            'until': (now - datetime.timedelta(hours=1)).isoformat(),
+        }).status_code, 400)
+        future = create_question('Future question?', days=5)
+        self.assertEqual(self.client.get(reverse('polls:timeline', args=(future.id,))).status_code, 404)
+
+    def test_rollup_command_rebuilds_from_votes(self):
+        """
+        rollup_votes rebuilds the buckets from the raw votes.
+        """
+        voted_at = datetime.datetime(2020, 11, 1, 20, 13, 45, tzinfo=datetime.timezone.utc)
+        for number in range(3):
+            user = User.objects.create_user('bulk%d' % number)
+            Vote.objects.create(question=self.question, choice=self.no, user=user,
+                                voted_at=voted_at + datetime.timedelta(minutes=number))
+        Vote.objects.create(question=self.question, choice=self.yes, voted_at=None)
+        call_command('rollup_votes', stdout=StringIO())
+        self.assertFalse(VoteRollup.objects.filter(choice=self.yes).exists())
+        self.assertEqual(VoteRollup.objects.get(resolution=VoteRollup.HOUR).count, 3)
+        self.assertEqual(
+            list(VoteRollup.objects.filter(resolution=VoteRollup.MINUTE).order_by('bucket').values_list(
+                'bucket', 'count')),
+            [(VoteRollup.truncate(voted_at + datetime.timedelta(minutes=n), VoteRollup.MINUTE), 1)
+             for n in range(3)]
+        )
@@ -1,35 +1,51 @@
 # from django.template import loader
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
 from django.views import generic
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
 
 from django.contrib.auth.decorators import login_required
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from django.contrib import messages
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 
-from .models import Choice, Question, Vote
+from .cache import cache_anonymous_page, invalidate_page_cache
+from .models import Choice, Question, Vote, VoteRollup
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 log = logging.getLogger("polls")
 logging.basicConfig(level=logging.INFO, format="")
 
+@method_decorator(cache_anonymous_page, name='dispatch')
 class IndexView(generic.ListView):
     template_name = 'polls/index.html'
     context_object_name = 'latest_question_list'
 
+    search_limit = 100
+
     def get_queryset(self):
         """
         Return the all published questions (not including those set to be
-        published in the future).
+        published in the future). When `?q=` is given, return the published
+        questions matching it instead, ranked by relevance.
         """
-        return Question.objects.filter(
-            pub_date__lte=timezone.now()
-        ).order_by('-pub_date')[:1000]
+        questions = Question.objects.filter(pub_date__lte=timezone.now())
+        query = self.request.GET.get('q', '').strip()
+        if query:
+            return questions.search(query)[:self.search_limit]
+        return questions.order_by('-pub_date')[:1000]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '').strip()
+        return context
 
 
 class DetailView(generic.DetailView):
@@ -43,6 +59,7 @@ class DetailView(generic.DetailView):
         return Question.objects.filter(pub_date__lte=timezone.now())
 
 
+@method_decorator(cache_anonymous_page, name='dispatch')
 class ResultsView(generic.DetailView):
     model = Question
     template_name = 'polls/results.html'
@@ -88,7 +105,13 @@ def vote(request, question_id):
             'question': question,
         })
     else:
-        Vote.objects.update_or_create(defaults={'choice': choice}, question=question, user=user)
+        with transaction.atomic():
+            previous = Vote.objects.filter(question=question, user=user).select_related('choice').first()
+            vote, _ = Vote.objects.update_or_create(
+                defaults={'choice': choice, 'voted_at': timezone.now()}, question=question, user=user)
+            if previous is not None and previous.choice is not None and previous.voted_at is not None:
+                VoteRollup.record(previous.choice, previous.voted_at, delta=-1)
+            VoteRollup.record(choice, vote.voted_at)
         for choice in question.choice_set.all():
             choice.votes = Vote.objects.filter(question=question).filter(choice=choice).count()
             choice.save()
@@ -97,6 +120,76 @@ def vote(request, question_id):
         return HttpResponseRedirect(reverse('polls:results', args=(question.id,)))
 
 
+# Default and largest time range a single timeline request may cover.
+TIMELINE_WINDOWS = {
+    VoteRollup.MINUTE: timedelta(hours=24),
+    VoteRollup.HOUR: timedelta(days=30),
+}
+
+
+def _parse_moment(value):
+    """
+    Parse an ISO 8601 datetime from a query parameter, assuming the current
+    time zone when it has none. Returns None if `value` is not a datetime.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is not None and timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+    except (ValueError, OverflowError):
+        return None
+    return moment
+
+
+def timeline(request, pk):
+    """
+    Return the vote timeline of a published question as JSON, read from the
+    minute or hour rollups (`?resolution=`, hour by default).
+
+    `?since=` and `?until=` bound the buckets returned. Without them the
+    timeline covers the last window (a day of minutes or 30 days of hours)
+    before the question closed or now, and a range wider than that window
+    is rejected.
+    """
+    question = get_object_or_404(Question, pk=pk, pub_date__lte=timezone.now())
+    resolution = request.GET.get('resolution', VoteRollup.HOUR)
+    if resolution not in TIMELINE_WINDOWS:
+        return JsonResponse({'error': 'resolution must be minute or hour'}, status=400)
+    window = TIMELINE_WINDOWS[resolution]
+
+    until = min(timezone.now(), question.end_date)
+    since = None
+    if 'until' in request.GET:
+        until = _parse_moment(request.GET['until'])
+    if 'since' in request.GET:
+        since = _parse_moment(request.GET['since'])
+        if since is None:
+            return JsonResponse({'error': 'since must be an ISO 8601 datetime'}, status=400)
+    if until is None:
+        return JsonResponse({'error': 'until must be an ISO 8601 datetime'}, status=400)
+    try:
+        if since is None:
+            since = until - window
+        first_bucket = VoteRollup.truncate(since, resolution)
+    except OverflowError:
+        return JsonResponse({'error': 'since and until must be within the supported date range'}, status=400)
+    if since > until or until - since > window:
+        return JsonResponse({'error': 'since must be before until and at most %s apart' % window}, status=400)
+
+    rollups = VoteRollup.objects.filter(
+        question=question, resolution=resolution, bucket__gte=first_bucket, bucket__lte=until,
+    ).order_by('bucket', 'choice_id').values_list('bucket', 'choice_id', 'count')
+    return JsonResponse({
+        'question': question.id,
+        'resolution': resolution,
+        'since': since,
+        'until': until,
+        'choices': [{'id': choice.id, 'text': choice.choice_text} for choice in question.choice_set.all()],
+        'timeline': [{'bucket': bucket, 'choice': choice_id, 'votes': count}
+                     for bucket, choice_id, count in rollups],
+    })
+
+
 def get_client_ip(request):
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
@@ -122,3 +215,26 @@ def get_ip_login_failed(sender, request, user, **kwargs):
     ip = get_client_ip(request)
     date = datetime.now()
     log.warning('Login user(failure): %s , IP: %s , Date: %s', request.user.username , ip, str(date))
+
+@receiver([post_save, post_delete], sender=Question)
+def clear_page_cache(sender, **kwargs):
+    # Bump after commit, or a concurrent request could store the old rows
+    # under the new generation.
+    transaction.on_commit(invalidate_page_cache)
+
+@receiver(post_delete, sender=Vote)
+def discard_vote_rollup(sender, instance, **kwargs):
+    # Votes deleted outside the vote view (admin, cascades from User) must
+    # leave the rollups too.
+    if instance.choice_id is None or instance.voted_at is None:
+        return
+    choice = Choice.objects.filter(pk=instance.choice_id).first()
+    if choice is not None:
+        VoteRollup.record(choice, instance.voted_at, delta=-1)
+
+@receiver([post_save, post_delete], sender=Choice)
+@receiver([post_save, post_delete], sender=Vote)
+def clear_question_page_cache(sender, instance, **kwargs):
+    question_id = instance.question_id
+    if question_id is not None:
+        transaction.on_commit(lambda: invalidate_page_cache(question_id))